@@ -0,0 +1,172 @@
+import numpy as np
+
+
+class BidStore:
+    """
+    Columnar store of bids kept in NumPy arrays so tender analytics can be
+    computed with vectorized operations instead of row-by-row loops.
+    """
+    max_amount = 1e12 #largest bid amount accepted into the store
+    merge_limit = 1000 #new bids merged into the cached order before a full re-sort
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.scanned_height = 0 #highest block already scanned for bids
+        self.amounts = np.empty(capacity, dtype=np.float64)
+        self.tender_ids = np.empty(capacity, dtype=np.int64)
+        self.bidder_ids = np.empty(capacity, dtype=np.int64)
+        self.heights = np.empty(capacity, dtype=np.int64)
+        self.tenders = [] #tender title for each tender id
+        self.bidders = [] #bidder username for each bidder id
+        self.tender_index = {}
+        self.bidder_index = {}
+        self._grouped = None #cached (order, starts, ends, n) of the first n bids sorted by tender
+
+    def _grow(self):
+        capacity = max(1, 2 * len(self.amounts))
+        for name in ('amounts', 'tender_ids', 'bidder_ids', 'heights'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def _intern(self, value, names, index):
+        if value not in index:
+            index[value] = len(names)
+            names.append(value)
+        return index[value]
+
+    def append(self, tender, bidder, amount, height):
+        """
+        A function that add a single bid to the end of the store.
+        """
+        if self.size == len(self.amounts):
+            self._grow()
+        i = self.size
+        self.amounts[i] = amount
+        self.tender_ids[i] = self._intern(tender, self.tenders, self.tender_index)
+        self.bidder_ids[i] = self._intern(bidder, self.bidders, self.bidder_index)
+        self.heights[i] = height
+        self.size += 1
+
+    def columns(self, n=None):
+        """
+        A function that return views of the first n rows of each column,
+        by default every bid appended so far.
+        """
+        if n is None:
+            n = self.size
+        return self.amounts[:n], self.tender_ids[:n], self.bidder_ids[:n], self.heights[:n]
+
+    def _full_sort(self, n):
+        amounts, tender_ids = self.columns(n)[:2]
+        order = np.argsort(-amounts, kind='stable')
+        order = order[np.argsort(tender_ids[order], kind='stable')]
+        return order
+
+    def _merge_sort(self, n):
+        #insert bids appended since the cached order into it instead of sorting everything again
+        order, cached_n = self._grouped[0], self._grouped[3]
+        amounts, tender_ids = self.columns(n)[:2]
+        new = np.arange(cached_n, n)
+        new = new[np.lexsort((new, -amounts[new], tender_ids[new]))]
+        sorted_tenders = tender_ids[order]
+        sorted_amounts = amounts[order]
+        lo = np.searchsorted(sorted_tenders, tender_ids[new], side='left')
+        hi = np.searchsorted(sorted_tenders, tender_ids[new], side='right')
+        positions = np.empty(len(new), dtype=np.int64)
+        for k in range(len(new)):
+            #within the tender's group amounts descend, so count the bids at or above this one
+            group = sorted_amounts[lo[k]:hi[k]]
+            positions[k] = lo[k] + np.searchsorted(-group, -amounts[new[k]], side='right')
+        return np.insert(order, positions, new)
+
+    def _sorted_by_tender(self, n):
+        #bids grouped by tender, highest amount first, block order on ties
+        if self._grouped is not None and self._grouped[3] == n:
+            return self._grouped[:3]
+        if self._grouped is not None and 0 < n - self._grouped[3] <= self.merge_limit:
+            order = self._merge_sort(n)
+        else:
+            order = self._full_sort(n)
+        sorted_tenders = self.tender_ids[:n][order]
+        starts = np.flatnonzero(np.r_[True, sorted_tenders[1:] != sorted_tenders[:-1]])
+        ends = np.r_[starts[1:], len(order)] - 1
+        self._grouped = (order, starts, ends, n)
+        return order, starts, ends
+
+    def tender_summary(self, n=None):
+        """
+        A function that return bid count, max, min and mean amount per tender
+        as a dict of arrays indexed by tender id.
+        """
+        if n is None:
+            n = self.size
+        amounts, tender_ids = self.columns(n)[:2]
+        tenders = len(self.tenders)
+        count = np.bincount(tender_ids, minlength=tenders)
+        total = np.bincount(tender_ids, weights=amounts, minlength=tenders)
+        high = np.full(tenders, np.nan)
+        low = np.full(tenders, np.nan)
+        if n:
+            order, starts, ends = self._sorted_by_tender(n)
+            present = tender_ids[order[starts]]
+            high[present] = amounts[order[starts]]
+            low[present] = amounts[order[ends]]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+        return {'tender': np.array(self.tenders[:tenders], dtype=object),
+                'count': count,
+                'max': high,
+                'min': low,
+                'mean': mean}
+
+    def top_bids(self):
+        """
+        A function that return a dict of tender title to (bidder, amount) for
+        the highest bid on each tender, the earliest bid winning ties.
+        """
+        n = self.size
+        if not n:
+            return {}
+        amounts, tender_ids, bidder_ids = self.columns(n)[:3]
+        order, starts, ends = self._sorted_by_tender(n)
+        best = order[starts]
+        return {self.tenders[t]: (self.bidders[b], a)
+                for t, b, a in zip(tender_ids[best], bidder_ids[best], amounts[best])}
+
+    def ranks(self, n=None):
+        """
+        A function that return the rank of every bid within its tender,
+        1 being the highest amount, aligned with the store columns.
+        """
+        if n is None:
+            n = self.size
+        rank = np.empty(n, dtype=np.int64)
+        if not n:
+            return rank
+        order, starts, ends = self._sorted_by_tender(n)
+        group_start = np.repeat(starts, ends - starts + 1)
+        rank[order] = np.arange(n) - group_start + 1
+        return rank
+
+    def tender_histograms(self, bins=10, n=None):
+        """
+        A function that return a (tenders, bins) array of bid counts, each
+        tender binned evenly between its own min and max bid.
+        """
+        if n is None:
+            n = self.size
+        amounts, tender_ids = self.columns(n)[:2]
+        summary = self.tender_summary(n)
+        with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+            spread = summary['max'] - summary['min']
+            scale = np.where(spread > 0, bins / spread, 0)
+            position = (amounts - summary['min'][tender_ids]) * scale[tender_ids]
+        #clip before the integer cast so overflowing or nan positions cannot give negative bins
+        np.clip(position, 0, bins - 1, out=position)
+        position[np.isnan(position)] = 0
+        bin_ids = position.astype(np.int64)
+        tenders = len(summary['tender'])
+        counts = np.bincount(tender_ids * bins + bin_ids, minlength=tenders * bins)
+        return counts.reshape(tenders, bins)
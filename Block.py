@@ -3,17 +3,112 @@ import json
 import time
 
 
+def hash_leaf(transaction):
+    """
+    A function that return the merkle leaf hash of a single transaction.
+    Leaves and inner nodes use different prefixes so a leaf can never be
+    passed off as an inner node.
+    """
+    return sha256(b'\x00' + str(transaction).encode()).hexdigest()
+
+
+def hash_node(left, right):
+    """
+    A function that return the merkle hash of two child hashes.
+    """
+    return sha256(b'\x01' + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def merkle_levels(transactions):
+    """
+    A function that return every level of the merkle tree, leaves first.
+    An unpaired node at the end of a level is carried up unchanged.
+    """
+    level = [hash_leaf(tx) for tx in transactions]
+    if not level:
+        return [[sha256(b'').hexdigest()]]
+    levels = [level]
+    while len(level) > 1:
+        parent = []
+        for i in range(0, len(level) - 1, 2):
+            parent.append(hash_node(level[i], level[i + 1]))
+        if len(level) % 2 == 1:
+            parent.append(level[-1])
+        level = parent
+        levels.append(level)
+    return levels
+
+
+def compute_merkle_root(transactions):
+    """
+    A function that return the merkle root over a list of transactions.
+    """
+    return merkle_levels(transactions)[-1][0]
+
+
+def verify_inclusion_proof(transaction, proof, merkle_root):
+    """
+    A function that check a transaction against a block merkle root using
+    the proof returned by Block.get_inclusion_proof.
+    """
+    computed = hash_leaf(transaction)
+    for sibling, side in proof:
+        if side == 'left':
+            computed = hash_node(sibling, computed)
+        elif side == 'right':
+            computed = hash_node(computed, sibling)
+        else:
+            return False
+    return computed == merkle_root
+
+
 class Block:
-    def __init__(self, index, transactions, timestamp, previous_hash):
+    def __init__(self, index, transactions, timestamp, previous_hash, difficulty=None):
         self.index = index
         self.transactions = transactions
         self.timestamp = timestamp
         self.previous_hash = previous_hash
+        self.merkle_root = compute_merkle_root(transactions)
+        self.difficulty = difficulty #leading zero bits required of the block hash
         self.nonce = 0
 
+    def header(self):
+        """
+        A function that return the block header fields covered by the hash.
+        """
+        return {'index': self.index,
+                'timestamp': self.timestamp,
+                'previous_hash': self.previous_hash,
+                'merkle_root': self.merkle_root,
+                'difficulty': self.difficulty,
+                'nonce': self.nonce}
+
     def compute_hash(self):
         """
         A function that return the hash of the block contents.
+        Blocks mined before merkle roots were added hash their full body,
+        minus the hash attribute stored on them after mining.
         """
-        block_string = json.dumps(self.__dict__, sort_keys=True)
+        if not hasattr(self, 'merkle_root'):
+            body = {k: v for k, v in self.__dict__.items() if k != 'hash'}
+            block_string = json.dumps(body, sort_keys=True)
+        else:
+            block_string = json.dumps(self.header(), sort_keys=True)
         return sha256(block_string.encode()).hexdigest()
+
+    def get_inclusion_proof(self, transaction):
+        """
+        A function that return the merkle path for a transaction in this block
+        as a list of (sibling_hash, side) pairs, or None if it is not present.
+        """
+        if transaction not in self.transactions:
+            return None
+        position = self.transactions.index(transaction)
+        proof = []
+        for level in merkle_levels(self.transactions)[:-1]:
+            if position % 2 == 1:
+                proof.append((level[position - 1], 'left'))
+            elif position + 1 < len(level):
+                proof.append((level[position + 1], 'right'))
+            position = position // 2
+        return proof
@@ -4,24 +4,20 @@ import time
 import pickle
 from datetime import datetime
 import random
+import math
 import pyaes, pbkdf2, binascii, os, secrets
 import base64
-
-class Block:
-    def __init__(self, index, transactions, timestamp, previous_hash):
-        self.index = index
-        self.transactions = transactions
-        self.timestamp = timestamp
-        self.previous_hash = previous_hash
-        self.nonce = 0
-
-    def compute_hash(self):
-        block_string = json.dumps(self.__dict__, sort_keys=True)
-        return sha256(block_string.encode()).hexdigest()
+from Block import Block, compute_merkle_root, verify_inclusion_proof
 
 class Blockchain:
-    # difficulty of our PoW algorithm
-    difficulty = 2 #using difficulty 2 computation
+    # difficulty of our PoW algorithm, counted in leading zero bits of the hash
+    difficulty = 8 #starting difficulty for a new chain
+    legacy_difficulty = 8 #blocks mined before per-block difficulty used 2 hex zeros, i.e. 8 bits
+    min_difficulty = 4 #safety floor so a block cannot claim to need no work
+    max_difficulty = 32
+    target_block_time = 0.005 #seconds of mining we aim to spend per block, mine() runs inside requests
+    retarget_window = 10 #number of recent blocks used for retargeting
+    max_retarget_step = 2 #most bits difficulty may move per block
 
     def __init__(self):
         self.unconfirmed_transactions = []
@@ -31,7 +27,7 @@ class Blockchain:
         self.translist = []
 
     def create_genesis_block(self): #create genesis block
-        genesis_block = Block(0, [], time.time(), "0")
+        genesis_block = Block(0, [], time.time(), "0", difficulty=Blockchain.difficulty)
         genesis_block.hash = genesis_block.compute_hash()
         self.chain.append(genesis_block)
 
@@ -45,6 +41,11 @@ class Blockchain:
         if previous_hash != block.previous_hash:
             return False
 
+        #mined_timestamp is not in the hashed header, so this schedule is only enforced
+        #when a block is added and cannot be re-verified from the chain later
+        if hasattr(block, 'difficulty') and block.difficulty != self.next_difficulty():
+            return False
+
         if not self.is_valid_proof(block, proof):
             return False
 
@@ -53,19 +54,40 @@ class Blockchain:
         self.chain.append(block)
         return True
 
-    def is_valid_proof(self, block, block_hash): #proof of work
-        return (block_hash.startswith('0' * Blockchain.difficulty) and block_hash == block.compute_hash())
+    @staticmethod
+    def meets_difficulty(block_hash, difficulty): #check hash has the required leading zero bits
+        return int(block_hash, 16) >> (256 - difficulty) == 0
+
+    def is_valid_proof(self, block, block_hash): #proof of work, checked against the block's own difficulty
+        difficulty = getattr(block, 'difficulty', Blockchain.legacy_difficulty)
+        if difficulty < Blockchain.min_difficulty:
+            return False
+        if hasattr(block, 'merkle_root') and block.merkle_root != compute_merkle_root(block.transactions):
+            return False #header hash only covers the body through the merkle root
+        return (Blockchain.meets_difficulty(block_hash, difficulty) and block_hash == block.compute_hash())
 
     def proof_of_work(self, block): #proof of work
         block.nonce = 0
 
         computed_hash = block.compute_hash()
-        while not computed_hash.startswith('0' * Blockchain.difficulty):
+        while not Blockchain.meets_difficulty(computed_hash, block.difficulty):
             block.nonce += 1
             computed_hash = block.compute_hash()
 
         return computed_hash
 
+    def next_difficulty(self): #retarget difficulty towards target_block_time using recent blocks
+        recent = [b for b in self.chain[-Blockchain.retarget_window:] if hasattr(b, 'mined_timestamp')]
+        current = getattr(self.last_block, 'difficulty', Blockchain.legacy_difficulty)
+        wanted = current
+        if recent:
+            work = sum(2 ** b.difficulty for b in recent)
+            elapsed = sum(max(b.mined_timestamp - b.timestamp, 1e-6) for b in recent)
+            hash_rate = work / elapsed
+            wanted = round(math.log2(max(hash_rate * Blockchain.target_block_time, 1)))
+            wanted = max(current - Blockchain.max_retarget_step, min(current + Blockchain.max_retarget_step, wanted))
+        return max(Blockchain.min_difficulty, min(Blockchain.max_difficulty, wanted))
+
     def add_new_transaction(self, transaction):
         self.unconfirmed_transactions.append(transaction)
 
@@ -84,14 +106,33 @@ class Blockchain:
         new_block = Block(index=last_block.index + 1,
                           transactions=self.unconfirmed_transactions,
                           timestamp=time.time(),
-                          previous_hash=last_block.hash)
+                          previous_hash=last_block.hash,
+                          difficulty=self.next_difficulty())
 
         proof = self.proof_of_work(new_block)
+        new_block.mined_timestamp = time.time() #not part of the header, only used for retargeting
         self.add_block(new_block, proof)
 
         self.unconfirmed_transactions = []
         return new_block.index
     
+    def get_inclusion_proof(self, block_index, transaction): #merkle proof of a transaction in a block
+        if block_index < 0 or block_index >= len(self.chain):
+            return None
+        block = self.chain[block_index]
+        if not hasattr(block, 'merkle_root'): #blocks mined before merkle roots carry no root to prove against
+            return None
+        proof = block.get_inclusion_proof(transaction)
+        if proof is None:
+            return None
+        return {'block_index': block.index,
+                'block_hash': block.hash,
+                'merkle_root': block.merkle_root,
+                'proof': proof}
+
+    def verify_transaction(self, transaction, proof, merkle_root): #check a transaction against a block header
+        return verify_inclusion_proof(transaction, proof, merkle_root)
+
     def save_object(self,obj, filename):
         with open(filename, 'wb') as output:
             pickle.dump(obj, output, pickle.HIGHEST_PROTOCOL)
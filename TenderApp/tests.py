@@ -1,3 +1,197 @@
+import base64
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from BidStore import BidStore
+from Block import Block, verify_inclusion_proof
+from Blockchain import Blockchain
+
+
+class MerkleProofTests(TestCase):
+
+    def check_round_trip(self, count):
+        transactions = ['tx%d' % i for i in range(count)]
+        block = Block(1, transactions, 0, '0')
+        for tx in transactions:
+            proof = block.get_inclusion_proof(tx)
+            self.assertTrue(verify_inclusion_proof(tx, proof, block.merkle_root))
+            self.assertFalse(verify_inclusion_proof(tx + 'x', proof, block.merkle_root))
+
+    def test_single_transaction(self):
+        self.check_round_trip(1)
+
+    def test_two_transactions(self):
+        self.check_round_trip(2)
+
+    def test_odd_transaction_counts(self):
+        for count in (3, 5, 7):
+            self.check_round_trip(count)
+
+    def test_missing_transaction(self):
+        block = Block(1, ['a', 'b'], 0, '0')
+        self.assertIsNone(block.get_inclusion_proof('c'))
+
+    def test_tampered_body_is_rejected(self):
+        blockchain = Blockchain()
+        blockchain.add_new_transaction('a')
+        blockchain.add_new_transaction('b')
+        blockchain.mine()
+        block = blockchain.last_block
+        self.assertTrue(blockchain.is_valid_proof(block, block.hash))
+        block.transactions[0] = 'evil'
+        self.assertFalse(blockchain.is_valid_proof(block, block.hash))
+
+
+class LegacyBlockTests(TestCase):
+
+    def mine_legacy_block(self):
+        #blocks mined before merkle roots had no merkle_root or difficulty and hashed their full body
+        block = Block(1, ['legacy'], 0, '0')
+        del block.merkle_root
+        del block.difficulty
+        block_hash = block.compute_hash()
+        while not block_hash.startswith('00'):
+            block.nonce += 1
+            block_hash = block.compute_hash()
+        block.hash = block_hash
+        return block
+
+    def test_legacy_block_validates(self):
+        block = self.mine_legacy_block()
+        self.assertTrue(Blockchain().is_valid_proof(block, block.hash))
+
+    def test_legacy_block_ignores_starting_difficulty(self):
+        block = self.mine_legacy_block()
+        with mock.patch.object(Blockchain, 'difficulty', 12):
+            self.assertTrue(Blockchain().is_valid_proof(block, block.hash))
+
+    def test_tampered_legacy_block_is_rejected(self):
+        block = self.mine_legacy_block()
+        block.transactions[0] = 'evil'
+        self.assertFalse(Blockchain().is_valid_proof(block, block.hash))
+
+
+class DifficultyTests(TestCase):
+
+    def chain_with(self, difficulty, mining_time):
+        blockchain = Blockchain()
+        for i in range(1, Blockchain.retarget_window + 1):
+            block = Block(i, ['tx%d' % i], 100.0 * i, '0', difficulty=difficulty)
+            block.mined_timestamp = block.timestamp + mining_time
+            blockchain.chain.append(block)
+        return blockchain
+
+    def test_meets_difficulty_is_bit_granular(self):
+        block_hash = '1' + 'f' * 63 #0001 1111... has exactly 3 leading zero bits
+        self.assertTrue(Blockchain.meets_difficulty(block_hash, 3))
+        self.assertFalse(Blockchain.meets_difficulty(block_hash, 4))
+        block_hash = '03' + 'f' * 62 #0000 0011... has exactly 6 leading zero bits
+        self.assertTrue(Blockchain.meets_difficulty(block_hash, 5))
+        self.assertTrue(Blockchain.meets_difficulty(block_hash, 6))
+        self.assertFalse(Blockchain.meets_difficulty(block_hash, 7))
+
+    def test_difficulty_rises_when_blocks_mine_fast(self):
+        self.assertEqual(self.chain_with(10, 1e-6).next_difficulty(), 10 + Blockchain.max_retarget_step)
+
+    def test_difficulty_falls_when_blocks_mine_slow(self):
+        self.assertEqual(self.chain_with(10, 60.0).next_difficulty(), 10 - Blockchain.max_retarget_step)
+
+    def test_difficulty_holds_on_target(self):
+        #2**10 hashes in target_block_time means the hash rate matches difficulty 10 exactly
+        self.assertEqual(self.chain_with(10, Blockchain.target_block_time).next_difficulty(), 10)
+
+    def test_difficulty_is_clamped(self):
+        self.assertEqual(self.chain_with(Blockchain.max_difficulty, 1e-6).next_difficulty(), Blockchain.max_difficulty)
+        self.assertEqual(self.chain_with(Blockchain.min_difficulty, 60.0).next_difficulty(), Blockchain.min_difficulty)
+
+    def test_new_chain_starts_at_default_difficulty(self):
+        self.assertEqual(Blockchain().next_difficulty(), Blockchain.difficulty)
+
+    def test_difficulty_below_minimum_is_rejected(self):
+        blockchain = Blockchain()
+        blockchain.add_new_transaction('a')
+        blockchain.mine()
+        block = blockchain.last_block
+        block.difficulty = 0
+        self.assertFalse(blockchain.is_valid_proof(block, block.compute_hash()))
+
+    def test_block_must_use_retargeted_difficulty(self):
+        blockchain = Blockchain()
+        last_block = blockchain.last_block
+        block = Block(1, ['a'], 0, last_block.hash, difficulty=blockchain.next_difficulty() + 1)
+        proof = blockchain.proof_of_work(block)
+        self.assertFalse(blockchain.add_block(block, proof))
+
+
+class BidStoreTests(TestCase):
+
+    def setUp(self):
+        self.store = BidStore(capacity=2)
+        bids = [('A', 'x', 5), ('A', 'y', 9), ('B', 'x', 3), ('A', 'z', 9), ('C', 'q', 1)]
+        for height, (tender, bidder, amount) in enumerate(bids, 1):
+            self.store.append(tender, bidder, amount, height)
+
+    def test_summary(self):
+        summary = self.store.tender_summary()
+        self.assertEqual(list(summary['tender']), ['A', 'B', 'C'])
+        self.assertEqual(list(summary['count']), [3, 1, 1])
+        self.assertEqual(list(summary['max']), [9, 3, 1])
+        self.assertEqual(list(summary['min']), [5, 3, 1])
+        self.assertAlmostEqual(summary['mean'][0], 23 / 3)
+
+    def test_ranks(self):
+        self.assertEqual(list(self.store.ranks()), [3, 1, 1, 2, 1])
+
+    def test_earliest_bid_wins_ties(self):
+        top_bids = self.store.top_bids()
+        self.assertEqual(top_bids['A'], ('y', 9))
+        self.assertEqual(top_bids['B'], ('x', 3))
+
+    def test_histograms(self):
+        self.assertEqual(self.store.tender_histograms(bins=3).tolist(), [[1, 0, 2], [1, 0, 0], [1, 0, 0]])
+
+    def test_empty_store(self):
+        store = BidStore()
+        self.assertEqual(store.top_bids(), {})
+        self.assertEqual(len(store.ranks()), 0)
+        self.assertEqual(len(store.tender_summary()['count']), 0)
+
+    def test_histograms_survive_extreme_amounts(self):
+        store = BidStore()
+        store.append('A', 'x', 1e308, 1)
+        store.append('A', 'y', -1e308, 2)
+        store.append('A', 'z', 0.0, 3)
+        self.assertEqual(store.tender_histograms(bins=3).sum(), 3)
+
+    def test_merged_order_matches_full_sort(self):
+        store = BidStore()
+        amounts = [4, 7, 7, 1, 9, 4, 7, 2, 9, 4, 3, 7]
+        for height, amount in enumerate(amounts):
+            store.append('T%d' % (height % 3), 'u%d' % height, amount, height)
+            store.ranks()
+            self.assertEqual(list(store._sorted_by_tender(store.size)[0]), list(store._full_sort(store.size)))
+
+
+class BidStoreSyncTests(TestCase):
+
+    def setUp(self):
+        from TenderApp import views
+        self.views = views
+        patchers = [mock.patch.object(views, 'blockchain', Blockchain()),
+                    mock.patch.object(views, 'bid_store', BidStore())]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def add_bid(self, amount):
+        enc = self.views.encrypt('bidding#T#' + amount + '#user#Pending')
+        self.views.blockchain.add_new_transaction(str(base64.b64encode(enc), 'utf-8'))
+        self.views.blockchain.mine()
+
+    def test_out_of_range_amounts_are_skipped(self):
+        for amount in ('5', 'nan', 'inf', '1e308', '-1e308', '0', 'abc'):
+            self.add_bid(amount)
+        store = self.views.syncBidStore()
+        self.assertEqual(store.size, 1)
+        self.assertEqual(store.scanned_height, len(self.views.blockchain.chain) - 1)
@@ -20,6 +20,7 @@ urlpatterns = [
 	       path("ViewTender", views.ViewTender, name="ViewTender"),
 	       path("EvaluateTender", views.EvaluateTender, name="EvaluateTender"),
 	       path("WinnerSelection", views.WinnerSelection, name="WinnerSelection"),
+	       path("BidReport", views.BidReport, name="BidReport"),
 	       path("Signup", views.Signup, name="Signup"),
 	       path("BidTenderActionPage", views.BidTenderActionPage, name="BidTenderActionPage"),
 	       path("BidTenderAction", views.BidTenderAction, name="BidTenderAction"),
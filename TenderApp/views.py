@@ -4,8 +4,10 @@ from django.contrib import messages
 from django.http import HttpResponse
 from django.core.files.storage import FileSystemStorage
 import os
+import threading
 from Blockchain import *
 from Block import *
+from BidStore import BidStore
 from datetime import date
 import pyaes, pbkdf2, binascii, os, secrets
 import base64
@@ -35,6 +37,30 @@ def decrypt(enc): #AES data decryption
     return decrypted
         
 
+bid_store = BidStore()
+bid_store_lock = threading.RLock() #held while syncing and while reading analytics from bid_store
+
+def syncBidStore(): #append bids from blocks mined since the last sync to the columnar store
+    with bid_store_lock:
+        for i in range(bid_store.scanned_height + 1, len(blockchain.chain)):
+            b = blockchain.chain[i]
+            for data in b.transactions:
+                data = base64.b64decode(data)
+                data = str(decrypt(data))
+                data = data[2:len(data)-1]
+                arr = data.split("#")
+                if arr[0] == "bidding":
+                    try:
+                        amount = float(arr[2])
+                    except ValueError:
+                        continue
+                    if not 0 < amount <= BidStore.max_amount: #also drops nan and inf
+                        continue
+                    bid_store.append(arr[1], arr[3], amount, b.index)
+        bid_store.scanned_height = len(blockchain.chain) - 1
+    return bid_store
+        
+
 def CreateTender(request):
     if request.method == 'GET':
        return render(request, 'CreateTender.html', {})
@@ -176,24 +202,12 @@ def EvaluateTender(request):
                     titles.append(arr[1])
                     print("vamsi")
 
+        with bid_store_lock:
+            top_bids = syncBidStore().top_bids()
         for k in range(len(titles)):
             selected = 'none'
-            initial = 0
-            for i in range(len(blockchain.chain)):
-                if i > 0:
-                    b = blockchain.chain[i]
-                    data = b.transactions[0]
-                    data = base64.b64decode(data)
-                    data = str(decrypt(data))
-                    data = data[2:len(data)-1]
-                    arr = data.split("#")
-                    if arr[0] == "bidding" and arr[4] == "Pending" and arr[1] == titles[k]:
-                        print("siri")
-                        print(arr[2])
-                        if float(arr[2]) > initial:
-                            initial = float(arr[2])
-                            selected = arr[3]
-                            print(selected)
+            if titles[k] in top_bids and top_bids[titles[k]][1] > 0:
+                selected = top_bids[titles[k]][0]
             if selected != 'none':
                 for i in range(len(blockchain.chain)):
                     if i > 0:
@@ -238,6 +252,33 @@ def WinnerSelection(request):
         context= {'data':output}
         return render(request, 'WinnerSelection.html', context)                    
 
+def BidReport(request):
+    if request.method == 'GET':
+        color = '<font size="" color="white">'
+        with bid_store_lock:
+            store = syncBidStore()
+            summary = store.tender_summary()
+            top_bids = store.top_bids()
+            histograms = store.tender_histograms(bins=5)
+            amounts, tender_ids, bidder_ids, heights = store.columns()
+            ranks = store.ranks()
+        output='<table border=1 align=center>'
+        output+='<tr><th>'+color+'Tender Title</th><th>'+color+'Bids</th><th>'+color+'Max Bid</th><th>'+color+'Min Bid</th><th>'+color+'Mean Bid</th><th>'+color+'Top Bidder</th><th>'+color+'Bid Distribution</th></tr>'
+        for t in range(len(summary['tender'])):
+            title = summary['tender'][t]
+            histogram = ' '.join(str(c) for c in histograms[t])
+            top_bidder = top_bids.get(title)
+            top_bidder = top_bidder[0] if top_bidder else ''
+            output+='<tr><td>'+color+title+'</td><td>'+color+str(summary['count'][t])+'</td><td>'+color+str(summary['max'][t])+'</td><td>'+color+str(summary['min'][t])+'</td><td>'+color+str(round(summary['mean'][t], 2))+'</td><td>'+color+top_bidder+'</td><td>'+color+histogram+'</td></tr>'
+        output+='</table><br/>'
+        output+='<table border=1 align=center>'
+        output+='<tr><th>'+color+'Block No</th><th>'+color+'Tender Title</th><th>'+color+'Username</th><th>'+color+'Amount</th><th>'+color+'Rank</th></tr>'
+        for i in np.flatnonzero(ranks <= 3): #only list the leading bids of each tender
+            output+='<tr><td>'+color+str(heights[i])+'</td><td>'+color+store.tenders[tender_ids[i]]+'</td><td>'+color+store.bidders[bidder_ids[i]]+'</td><td>'+color+str(amounts[i])+'</td><td>'+color+str(ranks[i])+'</td></tr>'
+        output+='</table>'
+        context= {'data':output}
+        return render(request, 'BidReport.html', context)
+
 def BidTenderActionPage(request):
     if request.method == 'POST':
         title = request.POST.get('t1', False)